@@ -1,45 +1,389 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import plotly.io as pio
+from pyarrow import feather
 import streamlit as st
 
-# Load the data
-@st.cache_data  # Cache data to speed up reruns
-def load_data():
-    """Loads the air quality data from CSV files and combines them.
+# Serialize figures with the orjson C extension instead of the stdlib encoder
+pio.json.config.default_engine = 'orjson'
+
+# Bump whenever _build_melted changes the columns or dtypes it produces, so
+# caches written by an older loader are ignored instead of served as-is
+MELTED_CACHE_VERSION = 2
+MELTED_CACHE_PATH = f'Data/hyd_air_quality_melted_v{MELTED_CACHE_VERSION}.feather'
+
+# Monitoring stations present as columns in every yearly CSV file
+KNOWN_LOCATIONS = [
+    'Balanagar, CITD office',
+    'Uppal, Modern food Industry, IDA',
+    'Jubilee Hills, Police station',
+    'Paradise, HMWS &SB Pump house',
+    'Charminar, TSRTC bus station',
+    'Jeedimetla, Industrial Association building',
+    'Abids, Police station',
+    'KBRN Park, DFO office',
+    'Langar House, Police Station',
+    'Madhapur, Shilpa Kalavedika',
+    'MGBS, Bus stand',
+    'Chikkadapally, Lepakshi Emporium',
+    'Kukatpally, JNTU',
+    'Nacharam, Police station',
+    'Rajendranagar, NG Ranga Agricultural University',
+    'Sainikpuri, MRO office',
+    'Buddha Purnima Project office, Tank Bund',
+    'Shameerpet, MRO office',
+]
+
+# Month abbreviations used in the CSV files, mapped to their month number
+MONTHS = {'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+          'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12}
+
+# AQI categories and their corresponding (inclusive) ranges
+AQI_CATEGORIES = {
+    "GOOD": (0, 50),
+    "SATISFACTORY": (51, 100),
+    "MODERATE": (101, 200),
+    "POOR": (201, 300),
+    "VERY POOR": (301, 400),
+    "SEVERE": (401, float("inf")),
+}
+
+# Years covered by the yearly CSV files
+YEARS = range(2016, 2024)
+
+# Explicit schema so the CSV parser can skip type inference
+LOC_DTYPES = {col: 'float32' for col in KNOWN_LOCATIONS}
+LOC_DTYPES['Month'] = 'string'
+
+
+def _csv_path(year):
+    """Returns the path of the CSV file holding one year of readings."""
+    return f'Data/hyd_air_quality_{year}.csv'
+
+
+def _cache_is_fresh():
+    """Checks that the cache exists and is newer than every yearly CSV file."""
+    if not os.path.exists(MELTED_CACHE_PATH):
+        return False
+    cache_mtime = os.path.getmtime(MELTED_CACHE_PATH)
+    return all(os.path.getmtime(_csv_path(year)) <= cache_mtime for year in YEARS)
+
+
+def _write_cache(melted_df):
+    """Writes the cache atomically so other workers never map a partial file."""
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(MELTED_CACHE_PATH), suffix='.feather.tmp')
+    os.close(fd)
+    try:
+        melted_df.to_feather(tmp_path, compression='uncompressed')
+        os.replace(tmp_path, MELTED_CACHE_PATH)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _build_melted():
+    """Builds the long-format air quality data from the yearly CSV files.
 
     Returns:
         pandas.DataFrame: A DataFrame containing the combined air quality data.
     """
 
-    years = range(2016, 2024)
-    dfs = {}
-
-    for year in years:
-        file_path = f'Data/hyd_air_quality_{year}.csv'
-        df = pd.read_csv(file_path)
-        df['Year'] = year
-        dfs[year] = df
+    def read_year(year):
+        return pd.read_csv(_csv_path(year), engine='pyarrow',
+                           dtype=LOC_DTYPES).assign(Year=year)
 
-    # Combine all dataframes
-    combined_df = pd.concat(dfs.values(), ignore_index=True)
+    # The yearly files are independent, so read them concurrently and
+    # combine them with a single concat
+    with ThreadPoolExecutor(max_workers=len(YEARS)) as executor:
+        frames = list(executor.map(read_year, YEARS))
+    combined_df = pd.concat(frames, ignore_index=True)
+    combined_df['Year'] = combined_df['Year'].astype('int16')
 
     # Melt the dataframe to long format
     melted_df = pd.melt(
         combined_df, id_vars=['Month', 'Year'], var_name='Location', value_name='AQI')
 
-    # Convert Month to datetime
+    # Defensive guard: every current station column is read as float32, but
+    # a station added to the CSVs later without a LOC_DTYPES entry would be
+    # inferred as 64-bit and upcast the melted values
+    melted_df['AQI'] = pd.to_numeric(melted_df['AQI'], downcast='float')
+
+    # Build the date from integer year/month parts instead of parsing strings
+    month_number = melted_df['Month'].map(MONTHS).astype('int8')
     melted_df['Date'] = pd.to_datetime(
-        melted_df['Year'].astype(str) + '-' + melted_df['Month'], format='%Y-%b')
+        dict(year=melted_df['Year'], month=month_number, day=1))
+    melted_df['Month'] = pd.Categorical(
+        melted_df['Month'], categories=list(MONTHS), ordered=True)
+    melted_df['Location'] = melted_df['Location'].astype('category')
 
-    # Sort by date
-    melted_df = melted_df.sort_values('Date')
+    # Sort once by location then date, so each location's series is
+    # contiguous and already in date order for the pages that plot it
+    melted_df = melted_df.sort_values(['Location', 'Date'])
+    melted_df.reset_index(drop=True, inplace=True)
 
     return melted_df
 
+
+# Load the data
+@st.cache_data  # Cache data to speed up reruns
+def load_data():
+    """Loads the air quality data, preferring the on-disk Arrow IPC cache.
+
+    The CSV pipeline only runs when the cache file is missing or older than
+    any yearly CSV, and its result is written back uncompressed so later
+    processes can memory-map it and share the pages through the OS cache.
+
+    Returns:
+        tuple: A DataFrame containing the combined air quality data and the
+        list of monitoring locations it covers.
+    """
+
+    if _cache_is_fresh():
+        melted_df = feather.read_table(
+            MELTED_CACHE_PATH, memory_map=True).to_pandas()
+    else:
+        melted_df = _build_melted()
+        # The cache is only an optimization; a read-only or full Data/
+        # directory must not stop the app from rendering
+        try:
+            _write_cache(melted_df)
+        except OSError:
+            pass
+
+    locations = melted_df['Location'].cat.categories.tolist()
+
+    return melted_df, locations
+
+
+# Page aggregates, computed once and reused across reruns. The DataFrame
+# argument is prefixed with an underscore so Streamlit skips hashing it.
+@st.cache_data
+def monthly_mean(_df):
+    """Averages AQI per date for the Month-to-month Variations page.
+
+    Returns:
+        pandas.Series: Mean AQI indexed by Date and Year.
+    """
+    return _df.groupby(['Date', 'Year'])['AQI'].mean()
+
+
+@st.cache_data
+def hotspot_pivot(_df):
+    """Averages AQI per location and year for the Pollution Hotspots page.
+
+    Returns:
+        pandas.DataFrame: Mean AQI indexed by Location with one column per Year.
+    """
+    return _df.groupby(['Location', 'Year'], observed=True)['AQI'].mean().unstack('Year')
+
+
+@st.cache_data
+def correlation_matrix(_df):
+    """Correlates AQI between locations for the Correlation Analysis page.
+
+    Returns:
+        pandas.DataFrame: Location-by-location correlation matrix.
+    """
+    # Each (Date, Location) pair is unique, so no aggregation is needed
+    correlation_df = _df.set_index(['Date', 'Location'])['AQI'].unstack('Location')
+
+    # Drop incomplete dates once so the whole matrix goes through np.corrcoef
+    matrix = correlation_df.dropna().to_numpy(dtype=np.float32)
+    return pd.DataFrame(np.corrcoef(matrix, rowvar=False),
+                        index=correlation_df.columns, columns=correlation_df.columns)
+
+
+@st.cache_data
+def yearly_mean(_df):
+    """Averages AQI per year for the Yearly Average Trend page.
+
+    Returns:
+        pandas.Series: Mean AQI indexed by Year.
+    """
+    return _df.groupby('Year')['AQI'].mean()
+
+
+@st.cache_resource
+def sorted_by_aqi(_df):
+    """Sorts the data by AQI so the AQI Category Analysis page can slice ranges.
+
+    Cached as a resource so each dropdown change reuses the same frame
+    instead of unpickling a copy; callers must treat it as read-only.
+
+    Returns:
+        pandas.DataFrame: The data in ascending AQI order with a fresh index.
+    """
+    return _df.sort_values('AQI', kind='stable').reset_index(drop=True)
+
+
+@st.cache_data
+def aqi_category_counts(_df):
+    """Counts observations per AQI category, location and year in one pass.
+
+    Each AQI value is assigned to its category with a single searchsorted
+    over the category upper bounds, then all counts are accumulated at once.
+
+    Returns:
+        dict: Maps each AQI category to a DataFrame of counts indexed by
+        Location with one column per Year, limited to non-zero rows/columns.
+    """
+    lower_bounds = np.array([low for low, _ in AQI_CATEGORIES.values()])
+    upper_bounds = np.array([high for _, high in AQI_CATEGORIES.values()])
+
+    aqi = _df['AQI'].to_numpy()
+    bucket = np.minimum(np.searchsorted(upper_bounds, aqi, side='left'),
+                        len(AQI_CATEGORIES) - 1)
+    # Values in the gaps between categories (or NaN) belong to none of them
+    in_range = (aqi >= lower_bounds[bucket]) & (aqi <= upper_bounds[bucket])
+
+    locations = _df['Location'].cat.categories
+    years = np.sort(_df['Year'].unique())
+    location_codes = _df['Location'].cat.codes.to_numpy()
+    year_codes = np.searchsorted(years, _df['Year'].to_numpy())
+
+    counts = np.zeros(
+        (len(AQI_CATEGORIES), len(locations), len(years)), dtype=np.int64)
+    np.add.at(counts, (bucket[in_range], location_codes[in_range],
+                       year_codes[in_range]), 1)
+
+    category_counts = {}
+    for i, category in enumerate(AQI_CATEGORIES):
+        table = pd.DataFrame(
+            counts[i], index=pd.Index(locations, name='Location'),
+            columns=pd.Index(years, name='Year'))
+        category_counts[category] = table.loc[
+            table.any(axis=1), table.any(axis=0)]
+
+    return category_counts
+
+
+# Figure builders, one per page. Cached as resources so revisiting a page
+# reuses the existing Figure instead of rebuilding traces and layout. Plotly
+# is imported inside each builder so pages without charts skip it.
+@st.cache_resource
+def build_annual_fig(_df):
+    """Box plot of AQI per year."""
+    import plotly.express as px
+
+    return px.box(_df, x='Year', y='AQI', title='Annual Air Quality Trends')
+
+
+@st.cache_resource
+def build_seasonal_fig(_df):
+    """Box plot of AQI per month, one color per year."""
+    import plotly.express as px
+
+    return px.box(
+        _df, x='Month', y='AQI', color='Year', title='Seasonal Air Quality Patterns')
+
+
+@st.cache_resource
+def build_monthly_fig(_df):
+    """Line chart of the mean AQI per date, one line per year."""
+    import plotly.express as px
+
+    # Plot straight from the grouped Series instead of resetting its index
+    monthly_avg = monthly_mean(_df)
+    return px.line(x=monthly_avg.index.get_level_values('Date'), y=monthly_avg.values,
+                   color=monthly_avg.index.get_level_values('Year'),
+                   labels={'x': 'Date', 'y': 'AQI', 'color': 'Year'},
+                   title='Monthly Air Quality Variations')
+
+
+@st.cache_resource
+def build_locations_fig(_df):
+    """Box plot of AQI per location, with angled tick labels."""
+    import plotly.express as px
+
+    fig_locations = px.box(
+        _df, x='Location', y='AQI', title='Air Quality Comparison Across Locations', height=600)
+    fig_locations.update_xaxes(tickangle=45)
+    return fig_locations
+
+
+@st.cache_resource
+def build_heatmap_fig(_df):
+    """Heatmap of mean AQI per location and year."""
+    import plotly.express as px
+
+    fig_heatmap = px.imshow(
+        hotspot_pivot(_df), title='Pollution Hotspots Heatmap', height=600)
+    fig_heatmap.update_layout(coloraxis_colorscale='tealrose')
+    return fig_heatmap
+
+
+@st.cache_resource
+def build_timeseries_fig(_df, locations):
+    """WebGL line chart of AQI over time, one trace per location."""
+    import plotly.express as px
+
+    return px.line(
+        _df, x='Date', y='AQI', color='Location',
+        category_orders={'Location': locations},
+        title='Air Quality Time Series by Location', height=550, render_mode='webgl')
+
+
+@st.cache_resource
+def build_correlation_fig(_df):
+    """Heatmap of the location-by-location AQI correlation matrix."""
+    import plotly.express as px
+
+    return px.imshow(
+        correlation_matrix(_df), title='Correlation Heatmap of Air Quality Across Locations',color_continuous_scale="RdYlGn_r")
+
+
+@st.cache_resource
+def build_distribution_fig(_df):
+    """Builds the figure for the AQI Distribution page.
+
+    The histogram is binned here rather than in the browser, so only the
+    per-location bin counts are sent as stacked bar traces.
+
+    Returns:
+        plotly.graph_objects.Figure: The figure to display.
+    """
+    import plotly.graph_objects as go
+
+    n_bins = 50
+    aqi = _df['AQI'].to_numpy()
+    # Missing readings are left out, as px.histogram does
+    valid = np.isfinite(aqi)
+    aqi = aqi[valid]
+    bins = np.linspace(0, aqi.max(), n_bins + 1)
+    # The maximum value falls on the last edge; keep it in the final bin
+    bin_codes = np.clip(np.digitize(aqi, bins) - 1, 0, n_bins - 1)
+
+    locations = _df['Location'].cat.categories
+    location_codes = _df['Location'].cat.codes.to_numpy()[valid]
+    counts = np.zeros((len(locations), n_bins), dtype=np.int32)
+    np.add.at(counts, (location_codes, bin_codes), 1)
+
+    bin_centers = (bins[:-1] + bins[1:]) / 2
+    fig_distribution = go.Figure(
+        [go.Bar(x=bin_centers, y=row, width=bins[1] - bins[0], name=location)
+         for location, row in zip(locations, counts)])
+    fig_distribution.update_layout(
+        title='Distribution of AQI Values by Location', barmode='stack', bargap=0,
+        xaxis_title='AQI', yaxis_title='count', legend_title_text='Location', height=600)
+    return fig_distribution
+
+
+@st.cache_resource
+def build_yearly_trend_fig(_df):
+    """Line chart of the mean AQI per year."""
+    import plotly.express as px
+
+    yearly_avg = yearly_mean(_df)
+    return px.line(x=yearly_avg.index, y=yearly_avg.values,
+                   labels={'x': 'Year', 'y': 'AQI'}, title='Yearly Average AQI Trend')
+
 # Load data using the cached function
-melted_df = load_data()
+melted_df, locations = load_data()
 
 # Streamlit app title
 st.title("Hyderabad Air Quality Analysis")
@@ -61,121 +405,79 @@ if selected_page == "Overview":
 
 elif selected_page == "Annual Trends":
     st.header("Annual Air Quality Trends")
-    fig_annual = px.box(melted_df, x='Year', y='AQI',
-                        title='Annual Air Quality Trends')
-    st.plotly_chart(fig_annual)
+    st.plotly_chart(build_annual_fig(melted_df))
     st.write(
         "*How to Use:* This box plot visualizes the distribution of AQI values for each year. Observe the median (middle line), quartiles (box edges), and outliers (points outside the whiskers) to understand how air quality has changed over the years.")
 
 elif selected_page == "Seasonal Patterns":
     st.header("Seasonal Air Quality Patterns")
-    fig_seasonal = px.box(
-        melted_df, x='Month', y='AQI', color='Year', title='Seasonal Air Quality Patterns')
-    st.plotly_chart(fig_seasonal)
+    st.plotly_chart(build_seasonal_fig(melted_df))
     st.write(
         "*How to Use:* This box plot displays the variation in AQI across different months, with each year represented by a different color. Look for patterns or trends that repeat annually, indicating potential seasonal influences on air quality.")
 
 elif selected_page == "Month-to-month Variations":
     st.header("Month-to-month Air Quality Variations")
-    fig_monthly = px.line(melted_df.groupby(['Date', 'Year'])['AQI'].mean(
-    ).reset_index(), x='Date', y='AQI', color='Year', title='Monthly Air Quality Variations')
-    st.plotly_chart(fig_monthly)
+    st.plotly_chart(build_monthly_fig(melted_df))
     st.write(
         "*How to Use:* This line graph illustrates the average monthly AQI values over time. It helps visualize how air quality fluctuates throughout the year and identify periods with higher or lower pollution levels.")
 
 elif selected_page == "Location Comparison":
     st.header("Air Quality Comparison Across Locations")
-    fig_locations = px.box(
-        melted_df, x='Location', y='AQI', title='Air Quality Comparison Across Locations', height=600)
-    fig_locations.update_xaxes(tickangle=45)
-    st.plotly_chart(fig_locations)
+    st.plotly_chart(build_locations_fig(melted_df))
     st.write(
         "*How to Use:* This box plot compares the distribution of AQI values for different locations within Hyderabad. Analyze the median, quartiles, and outliers to identify locations with better or worse air quality.")
 
 elif selected_page == "Pollution Hotspots":
     st.header("Pollution Hotspots Heatmap")
-    pivot_df = melted_df.pivot_table(
-        values='AQI', index='Location', columns='Year', aggfunc='mean')
-    fig_heatmap = px.imshow(
-        pivot_df, title='Pollution Hotspots Heatmap', height=600)
-    fig_heatmap.update_layout(coloraxis_colorscale='tealrose')
-    st.plotly_chart(fig_heatmap)
+    st.plotly_chart(build_heatmap_fig(melted_df))
     st.write(
         "*How to Use:* This heatmap provides a visual representation of average AQI levels for different locations across the years. Darker shades indicate higher pollution levels, making it easy to identify potential hotspots.")
 
 elif selected_page == "Time Series":
     st.header("Air Quality Time Series by Location")
-    fig_timeseries = go.Figure()
-
-    for location in melted_df['Location'].unique():
-        df_location = melted_df[melted_df['Location'] == location]
-        fig_timeseries.add_trace(go.Scatter(
-            x=df_location['Date'], y=df_location['AQI'], mode='lines', name=location))
-
-    fig_timeseries.update_layout(
-        title='Air Quality Time Series by Location', xaxis_title='Date', yaxis_title='AQI', height=550)
-    st.plotly_chart(fig_timeseries)
+    st.plotly_chart(build_timeseries_fig(melted_df, locations))
     st.write(
         "*How to Use:* This interactive line graph displays the AQI values for each location over time. Use the legend to select specific locations and observe how their air quality has evolved.")
 
 elif selected_page == "Correlation Analysis":
     st.header("Correlation Heatmap of Air Quality Across Locations")
-    correlation_df = melted_df.pivot_table(
-        values='AQI', index='Date', columns='Location')
-    correlation_matrix = correlation_df.corr()
-    fig_correlation = px.imshow(
-        correlation_matrix, title='Correlation Heatmap of Air Quality Across Locations',color_continuous_scale="RdYlGn_r")
-    st.plotly_chart(fig_correlation)
+    st.plotly_chart(build_correlation_fig(melted_df))
     st.write(
         "*How to Use:* This correlation heatmap visualizes the relationships between AQI values at different locations. Positive correlations (closer to 1, brighter shades) suggest similar air quality trends, while negative correlations (closer to -1, darker shades) indicate inverse relationships.")
 
 elif selected_page == "AQI Distribution":
     st.header("Distribution of AQI Values by Location")
-    fig_distribution = px.histogram(
-        melted_df, x='AQI', color='Location', title='Distribution of AQI Values by Location', height=600)
-    st.plotly_chart(fig_distribution)
+    st.plotly_chart(build_distribution_fig(melted_df))
     st.write(
         "*How to Use:* This histogram shows the frequency distribution of AQI values for each location. Analyze the shape, center, and spread of the distributions to understand the typical AQI range and potential outliers for different areas.")
 
 elif selected_page == "Yearly Average Trend":
     st.header("Yearly Average AQI Trend")
-    yearly_avg = melted_df.groupby('Year')['AQI'].mean().reset_index()
-    fig_yearly_trend = px.line(
-        yearly_avg, x='Year', y='AQI', title='Yearly Average AQI Trend')
-    st.plotly_chart(fig_yearly_trend)
+    st.plotly_chart(build_yearly_trend_fig(melted_df))
     st.write(
         "*How to Use:* This line graph depicts the overall trend in average AQI values over the years. Observe whether there's an increasing, decreasing, or fluctuating trend, indicating potential long-term changes in air quality.")
 
 elif selected_page == "AQI Category Analysis":
     st.header("AQI Category Analysis")
 
-    # Define the AQI categories and their corresponding ranges
-    aqi_categories = {
-        "GOOD": (0, 50),
-        "SATISFACTORY": (51, 100),
-        "MODERATE": (101, 200),
-        "POOR": (201, 300),
-        "VERY POOR": (301, 400),
-        "SEVERE": (401, float("inf")),
-    }
-
     # Create a dropdown to select the AQI category
     selected_category = st.selectbox(
-        "Select AQI Category", list(aqi_categories.keys()))
+        "Select AQI Category", list(AQI_CATEGORIES.keys()))
 
     # Filter the data based on the selected category
-    lower_bound, upper_bound = aqi_categories[selected_category]
-    filtered_df = melted_df[(
-        melted_df["AQI"] >= lower_bound) & (melted_df["AQI"] <= upper_bound)]
+    lower_bound, upper_bound = AQI_CATEGORIES[selected_category]
+    aqi_sorted_df = sorted_by_aqi(melted_df)
+    lower_index = aqi_sorted_df["AQI"].searchsorted(lower_bound, side="left")
+    upper_index = aqi_sorted_df["AQI"].searchsorted(upper_bound, side="right")
+    filtered_df = aqi_sorted_df.iloc[lower_index:upper_index]
 
     # Display the cities, months, and years when the selected category was observed
     st.write(
-        f"*Cities, Months, and Years for AQI Category {selected_category}:*")
+        f"*Cities, Months, and Years for AQI Category {selected_category}, ordered by AQI:*")
     st.write(filtered_df[["Location", "Month", "Year"]])
 
     # Prepare data for the bar chart
-    chart_data = filtered_df.groupby(
-        ["Location", "Year"]).size().unstack(fill_value=0)
+    chart_data = aqi_category_counts(melted_df)[selected_category]
 
     # Display the bar chart
     st.bar_chart(chart_data)